@@ -1,5 +1,19 @@
 def filter_by_cash_access(items, user):
     if user.is_admin:
         return items
-    allowed = set(user.allowed_cash_accounts or [])
-    return [x for x in items if x.get("paid_through_account_id") in allowed]
+    contains = user.allowed_cash_accounts_set.__contains__
+    return [x for x in items if contains(x.get("paid_through_account_id"))]
+
+
+def filter_by_owner_or_cash_access(items, user):
+    """
+    Non-admins see records they created or that pay through an allowed account.
+    """
+    if user.is_admin:
+        return items
+    uid = user.user_id
+    contains = user.allowed_cash_accounts_set.__contains__
+    return [
+        x for x in items
+        if (g := x.get)("created_by") == uid or contains(g("paid_through_account_id"))
+    ]
@@ -1,28 +1,52 @@
 from __future__ import annotations
 
+import re
+import sys
 from typing import Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
-from .config import settings
 from ..services.auth_store import auth_store
 
 
 security = HTTPBearer(auto_error=False)
 
+# Roles are interned on CurrentUser so the admin check is an identity test
+_ADMIN = sys.intern("admin")
+
+# Session tokens come from secrets.token_urlsafe (see new_session_token);
+# anything else can be rejected without touching the auth store.
+_TOKEN_RE = re.compile(r"^[A-Za-z0-9_\-]+$")
+_TOKEN_MIN_LEN = 20
+_TOKEN_MAX_LEN = 256
+
 
 class CurrentUser:
+    # Built once per authenticated request; slots keep it small
+    __slots__ = (
+        "user_id",
+        "email",
+        "role",
+        "is_admin",
+        "allowed_cash_accounts",
+        "allowed_cash_accounts_set",
+    )
+
     def __init__(self, data: dict):
+        role = sys.intern(data.get("role") or "")
         self.user_id = data.get("user_id")
         self.email = data.get("email")
-        self.role = data.get("role")
+        self.role = role
 
         # Derived helpers
-        self.is_admin: bool = self.role == "admin"
+        self.is_admin: bool = role is _ADMIN
         self.allowed_cash_accounts: list[str] = data.get(
             "allowed_cash_accounts", []
         )
+        self.allowed_cash_accounts_set: frozenset[str] = frozenset(
+            self.allowed_cash_accounts or ()
+        )
 
 
 def get_current_user(
@@ -38,6 +62,16 @@ def get_current_user(
         )
 
     token = creds.credentials
+    if (
+        len(token) < _TOKEN_MIN_LEN
+        or len(token) > _TOKEN_MAX_LEN
+        or not _TOKEN_RE.match(token)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token",
+        )
+
     user = auth_store.get_user_by_session(token)
 
     if not user:
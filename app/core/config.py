@@ -1,51 +1,81 @@
 import os
 from dataclasses import dataclass
+from functools import lru_cache
 from dotenv import load_dotenv
 
-load_dotenv()
+
+@lru_cache(maxsize=1)
+def load_env_once() -> bool:
+    """
+    Parse .env at most once per process; later callers get the cached result.
+    """
+    load_dotenv()
+    return True
+
+
+load_env_once()
+
+# Snapshot the environment once; the Settings defaults below are plain dict
+# lookups instead of repeated os.getenv calls through os.environ.
+_ENV = dict(os.environ)
+_get = _ENV.get
 
 
 @dataclass
 class Settings:
     # App
-    app_name: str = os.getenv("APP_NAME", "asset-service")
-    env: str = os.getenv("ENV", "dev")
+    app_name: str = _get("APP_NAME", "asset-service")
+    env: str = _get("ENV", "dev")
 
     # Company / Auth
-    company_email_domain: str = os.getenv("COMPANY_EMAIL_DOMAIN", "laveen-air.com")
-    auth_secret: str = os.getenv("AUTH_SECRET", "change-me-in-prod")
-    use_zoho: bool = os.getenv("USE_ZOHO", "true").lower() in ("1", "true", "yes")
+    company_email_domain: str = _get("COMPANY_EMAIL_DOMAIN", "laveen-air.com")
+    auth_secret: str = _get("AUTH_SECRET", "change-me-in-prod")
+    use_zoho: bool = _get("USE_ZOHO", "true").lower() in ("1", "true", "yes")
 
     # Local data paths
     # root is project root (two levels up from this file: app/core/config.py)
     project_root: str = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    data_dir: str = os.getenv("DATA_DIR", os.path.join(project_root, "data"))
-    uploads_dir: str = os.getenv("UPLOADS_DIR", os.path.join(data_dir, "uploads"))
+    data_dir: str = _get("DATA_DIR", os.path.join(project_root, "data"))
+    uploads_dir: str = _get("UPLOADS_DIR", os.path.join(data_dir, "uploads"))
 
     # Accrued handling
-    accrued_expenses_account_name: str = os.getenv("ACCRUED_EXPENSES_ACCOUNT_NAME", "Accrued Expenses")
-    accrued_paid_through_account_id: str = os.getenv("ACCRUED_PAID_THROUGH_ACCOUNT_ID", "")
+    accrued_expenses_account_name: str = _get("ACCRUED_EXPENSES_ACCOUNT_NAME", "Accrued Expenses")
+    accrued_paid_through_account_id: str = _get("ACCRUED_PAID_THROUGH_ACCOUNT_ID", "")
 
     # Zoho OAuth
-    zoho_client_id: str = os.getenv("ZOHO_CLIENT_ID", "")
-    zoho_client_secret: str = os.getenv("ZOHO_CLIENT_SECRET", "")
-    zoho_refresh_token: str = os.getenv("ZOHO_REFRESH_TOKEN", "")
-    zoho_org_id: str = os.getenv("ZOHO_ORG_ID", "")
-    zoho_dc: str = os.getenv("ZOHO_DC", "com")  # com, eu, in, etc.
-    zoho_redirect_uri: str = os.getenv("ZOHO_REDIRECT_URI", "http://localhost")
+    zoho_client_id: str = _get("ZOHO_CLIENT_ID", "")
+    zoho_client_secret: str = _get("ZOHO_CLIENT_SECRET", "")
+    zoho_refresh_token: str = _get("ZOHO_REFRESH_TOKEN", "")
+    zoho_org_id: str = _get("ZOHO_ORG_ID", "")
+    zoho_dc: str = _get("ZOHO_DC", "com")  # com, eu, in, etc.
+    zoho_redirect_uri: str = _get("ZOHO_REDIRECT_URI", "http://localhost")
+    # Refresh the access token this many seconds before Zoho's expiry
+    zoho_token_skew_s: int = int(_get("ZOHO_TOKEN_SKEW_S", "60"))
+    # Cap on attachment uploads in flight at once (each holds a multipart body)
+    zoho_max_concurrent_uploads: int = int(_get("ZOHO_MAX_CONCURRENT_UPLOADS", "4"))
 
     # Zoho Books
-    zoho_books_base_url: str = os.getenv("ZOHO_BOOKS_BASE_URL", "https://www.zohoapis.com/books/v3")
+    zoho_books_base_url: str = _get("ZOHO_BOOKS_BASE_URL", "https://www.zohoapis.com/books/v3")
 
     # COA CSV for dropdowns (optional local fallback)
     base_dir: str = os.path.dirname(os.path.abspath(__file__))
-    coa_csv_path: str = os.getenv("COA_CSV_PATH", os.path.join(base_dir, "Chart_of_Accounts.csv"))
+    coa_csv_path: str = _get("COA_CSV_PATH", os.path.join(base_dir, "Chart_of_Accounts.csv"))
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Process-wide Settings singleton. Usable directly or as Depends(get_settings).
+    """
+    return Settings()
 
 
-settings = Settings()
+settings = get_settings()
 
 # Keep original behavior by default, but allow disabling Zoho in dev via USE_ZOHO=false
-if settings.use_zoho and not all([settings.zoho_client_id, settings.zoho_client_secret, settings.zoho_refresh_token]):
+if settings.use_zoho and not (
+    settings.zoho_client_id and settings.zoho_client_secret and settings.zoho_refresh_token
+):
     raise RuntimeError(
         "Missing Zoho OAuth environment variables (ZOHO_CLIENT_ID/ZOHO_CLIENT_SECRET/ZOHO_REFRESH_TOKEN)"
     )
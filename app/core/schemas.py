@@ -0,0 +1,4 @@
+from pydantic import ConfigDict
+
+# Request bodies: unknown keys dropped, immutable, surrounding whitespace stripped
+PAYLOAD_CONFIG = ConfigDict(extra="ignore", frozen=True, str_strip_whitespace=True)
@@ -3,6 +3,8 @@ from __future__ import annotations
 import base64
 import hashlib
 import hmac
+import logging
+import re
 import secrets
 from typing import Optional
 
@@ -14,16 +16,33 @@ except Exception:  # pragma: no cover
     VerifyMismatchError = Exception  # type: ignore[misc]
 
 # If argon2-cffi is installed, this will be used for hashing new passwords too.
-_ARGON2: Optional["PasswordHasher"] = PasswordHasher() if PasswordHasher else None
+# Parameters only apply to new hashes; existing hashes embed their own
+# parameters and keep verifying.
+_ARGON2: Optional["PasswordHasher"] = (
+    PasswordHasher(time_cost=2, memory_cost=65536, parallelism=1)
+    if PasswordHasher
+    else None
+)
+
+if _ARGON2 is None:
+    logging.getLogger(__name__).warning(
+        "argon2-cffi not installed: new passwords use PBKDF2-SHA256 and "
+        "existing Argon2 hashes cannot be verified"
+    )
+
+_ARGON2_PREFIXES = ("$argon2id$", "$argon2i$", "$argon2d$")
+_MIN_HASH_LEN = 20
+_PBKDF2_RE = re.compile(r"^pbkdf2_sha256\$(\d+)\$([^$]+)\$([^$]+)$")
 
 
 def _b64e(b: bytes) -> str:
-    return base64.urlsafe_b64encode(b).decode("utf-8").rstrip("=")
+    return base64.urlsafe_b64encode(b).rstrip(b"=").decode("ascii")
 
 
 def _b64d(s: str) -> bytes:
-    pad = "=" * (-len(s) % 4)
-    return base64.urlsafe_b64decode((s + pad).encode("utf-8"))
+    s_b = s.encode("ascii")
+    pad = b"=" * (-len(s_b) % 4)
+    return base64.urlsafe_b64decode(s_b + pad)
 
 
 def hash_password(password: str, *, iterations: int = 200_000) -> str:
@@ -34,17 +53,20 @@ def hash_password(password: str, *, iterations: int = 200_000) -> str:
     if _ARGON2:
         return _ARGON2.hash(password)
 
+    pw_bytes = password.encode("utf-8")
     salt = secrets.token_bytes(16)
-    dk = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    dk = hashlib.pbkdf2_hmac("sha256", pw_bytes, salt, iterations)
     return f"pbkdf2_sha256${iterations}${_b64e(salt)}${_b64e(dk)}"
 
 
 def verify_password(password: str, hashed: str) -> bool:
-    if not hashed:
+    if not hashed or len(hashed) < _MIN_HASH_LEN:
         return False
 
     # Existing hashes in your users.json are Argon2:
     if hashed.startswith("$argon2"):
+        if not hashed.startswith(_ARGON2_PREFIXES):
+            return False
         if not _ARGON2:
             # argon2-cffi not installed => cannot verify these hashes
             return False
@@ -57,14 +79,15 @@ def verify_password(password: str, hashed: str) -> bool:
 
     # PBKDF2 fallback
     if hashed.startswith("pbkdf2_sha256$"):
+        m = _PBKDF2_RE.match(hashed)
+        if not m:
+            return False
         try:
-            algo, it_s, salt_s, dk_s = hashed.split("$", 3)
-            if algo != "pbkdf2_sha256":
-                return False
-            iterations = int(it_s)
-            salt = _b64d(salt_s)
-            dk_expected = _b64d(dk_s)
-            dk = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+            iterations = int(m.group(1))
+            salt = _b64d(m.group(2))
+            dk_expected = _b64d(m.group(3))
+            pw_bytes = password.encode("utf-8")
+            dk = hashlib.pbkdf2_hmac("sha256", pw_bytes, salt, iterations)
             return hmac.compare_digest(dk, dk_expected)
         except Exception:
             return False
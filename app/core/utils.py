@@ -1,4 +1,29 @@
+import mimetypes
 import os
+from functools import lru_cache
+from typing import Any, Dict
+
+
+@lru_cache(maxsize=1024)
+def ensure_dir(path: str) -> None:
+    """
+    os.makedirs(path, exist_ok=True), but only the first time per path in
+    this process; later calls are a cache hit instead of a stat syscall.
+    """
+    os.makedirs(path, exist_ok=True)
+
+
+def safe_float(v: Any) -> float:
+    """
+    float(v), or 0.0 for None, "" and anything unparseable.
+    """
+    if v is None or v == "":
+        return 0.0
+    # OverflowError covers ints too large for a float (e.g. 10**400)
+    try:
+        return float(v)
+    except (TypeError, ValueError, OverflowError):
+        return 0.0
 
 
 def guess_extension(filename: str | None, content_type: str | None) -> str:
@@ -15,7 +40,15 @@ def guess_extension(filename: str | None, content_type: str | None) -> str:
             return ".jpg"
     return ".bin"
 
-from typing import Any, Dict
+
+@lru_cache(maxsize=256)
+def _ct_for_ext(ext: str) -> str:
+    return mimetypes.guess_type("f" + ext)[0] or "application/octet-stream"
+
+
+def guess_content_type(filename: str) -> str:
+    # Keyed on the lowercased suffix so every receipt.pdf shares one lookup
+    return _ct_for_ext(os.path.splitext(filename)[1].lower())
 
 
 def ensure_ok_zoho(resp: Dict[str, Any]) -> Dict[str, Any]:
@@ -25,6 +58,12 @@ def ensure_ok_zoho(resp: Dict[str, Any]) -> Dict[str, Any]:
     Returns the response if OK.
     Raises RuntimeError if Zoho indicates an error.
     """
+    # Happy path: a plain dict (what the JSON decoder returns) with no error
+    if type(resp) is dict:
+        code = resp.get("code")
+        if (code is None or code == 0) and not resp.get("error"):
+            return resp
+
     if not isinstance(resp, dict):
         raise RuntimeError(f"Invalid Zoho response: {resp}")
 
@@ -1,14 +1,46 @@
 from __future__ import annotations
 
+import asyncio
+import importlib.util
+import secrets
 import time
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, Optional
 
+import anyio
 import httpx
+import orjson
 from fastapi import HTTPException
 
 from app.core.config import settings
 from app.core.utils import ensure_ok_zoho
 
+# orjson parses the raw response bytes directly (no text decode round-trip)
+_loads = orjson.loads
+_dumps = orjson.dumps
+
+# Connection-level retries only (connect errors / resets before a request is
+# sent), so retrying a POST can never duplicate an expense or journal.
+_TRANSPORT_RETRIES = 3
+
+# HTTP/2 lets concurrent calls multiplex over one TLS connection. httpx
+# needs the optional `h2` package for it; without it we stay on HTTP/1.1.
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+# Read size for streamed attachment bodies; bounds memory per upload
+_UPLOAD_CHUNK = 1 << 16
+
+# Zoho data centre -> accounts (OAuth) host
+_ACCOUNTS_URL: Dict[str, str] = {
+    "com": "https://accounts.zoho.com",
+    "eu": "https://accounts.zoho.eu",
+    "in": "https://accounts.zoho.in",
+    "au": "https://accounts.zoho.com.au",
+    "ca": "https://accounts.zohocloud.ca",
+    "jp": "https://accounts.zoho.jp",
+    "sa": "https://accounts.zoho.sa",
+}
+_DEFAULT_ACCOUNTS_URL = _ACCOUNTS_URL["com"]
+
 
 class ZohoClient:
     def __init__(self) -> None:
@@ -18,30 +50,75 @@ class ZohoClient:
         self.org_id = (settings.zoho_org_id or "").strip()
         self.dc = (settings.zoho_dc or "com").strip()
         self.books_base_url = (settings.zoho_books_base_url or "").strip()
+        self._auth_base = self._accounts_url()
+        self.token_skew_s = int(settings.zoho_token_skew_s)
 
         self._access_token: Optional[str] = None
-        self._access_token_expiry: float = 0.0
+        self._access_token_expiry: float = 0.0  # time.monotonic() deadline
+        # Header dicts rebuilt only when the token changes; httpx copies
+        # them into its own Headers object, so sharing them is safe.
+        self._auth_headers: Dict[str, str] = {}
+        self._json_headers: Dict[str, str] = {}
+        # Single-flight guard so concurrent callers share one token refresh
+        self._refresh_lock = asyncio.Lock()
+        # Bounds concurrent attachment uploads so a fan-out can't pile up
+        # open files and multipart bodies
+        self._upload_sem = asyncio.Semaphore(max(1, int(settings.zoho_max_concurrent_uploads or 4)))
+
+        # Long-lived clients so keep-alive connections / TLS sessions are
+        # reused across calls. Created lazily on first use inside the loop.
+        self._client: Optional[httpx.AsyncClient] = None
+        self._auth_client: Optional[httpx.AsyncClient] = None
+
+    # ---------------------------------------------------------
+    # HTTP clients
+    # ---------------------------------------------------------
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.books_base_url,
+                # httpx merges these with any per-request params
+                params={"organization_id": self.org_id},
+                timeout=60,
+                transport=httpx.AsyncHTTPTransport(
+                    http2=_HTTP2,
+                    retries=_TRANSPORT_RETRIES,
+                    limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+                ),
+            )
+        return self._client
+
+    def _get_auth_client(self) -> httpx.AsyncClient:
+        if self._auth_client is None:
+            self._auth_client = httpx.AsyncClient(
+                base_url=self._auth_base,
+                timeout=30,
+                transport=httpx.AsyncHTTPTransport(retries=_TRANSPORT_RETRIES),
+            )
+        return self._auth_client
+
+    async def aclose(self) -> None:
+        """
+        Close the shared clients (wired to app shutdown in create_app).
+        """
+        for client in (self._client, self._auth_client):
+            if client is not None:
+                await client.aclose()
+        self._client = None
+        self._auth_client = None
 
     # ---------------------------------------------------------
     # OAuth
     # ---------------------------------------------------------
 
     def _accounts_url(self) -> str:
-        return {
-            "com": "https://accounts.zoho.com",
-            "eu": "https://accounts.zoho.eu",
-            "in": "https://accounts.zoho.in",
-            "au": "https://accounts.zoho.com.au",
-            "ca": "https://accounts.zohocloud.ca",
-            "jp": "https://accounts.zoho.jp",
-            "sa": "https://accounts.zoho.sa",
-        }.get(self.dc, "https://accounts.zoho.com")
+        return _ACCOUNTS_URL.get(self.dc, _DEFAULT_ACCOUNTS_URL)
 
     async def _refresh_access_token(self) -> str:
         if not (self.client_id and self.client_secret and self.refresh_token):
             raise HTTPException(status_code=500, detail="Zoho OAuth settings missing")
 
-        url = f"{self._accounts_url()}/oauth/v2/token"
         data = {
             "refresh_token": self.refresh_token,
             "client_id": self.client_id,
@@ -49,21 +126,27 @@ class ZohoClient:
             "grant_type": "refresh_token",
         }
 
-        async with httpx.AsyncClient(timeout=30) as client:
-            r = await client.post(url, data=data)
+        r = await self._get_auth_client().post("/oauth/v2/token", data=data)
 
-        payload = r.json()
+        payload = _loads(r.content)
         if r.status_code != 200 or "access_token" not in payload:
             raise HTTPException(status_code=502, detail=payload)
 
         self._access_token = payload["access_token"]
-        self._access_token_expiry = time.time() + int(payload.get("expires_in", 3600)) - 60
+        self._auth_headers = {"Authorization": f"Zoho-oauthtoken {self._access_token}"}
+        self._json_headers = {**self._auth_headers, "Content-Type": "application/json"}
+        self._access_token_expiry = time.monotonic() + int(payload.get("expires_in", 3600)) - self.token_skew_s
         return self._access_token
 
     async def get_access_token(self) -> str:
-        if self._access_token and time.time() < self._access_token_expiry:
+        if self._access_token and time.monotonic() < self._access_token_expiry:
             return self._access_token
-        return await self._refresh_access_token()
+
+        async with self._refresh_lock:
+            # Another coroutine may have refreshed while we waited
+            if self._access_token and time.monotonic() < self._access_token_expiry:
+                return self._access_token
+            return await self._refresh_access_token()
 
     # ---------------------------------------------------------
     # Core request
@@ -78,38 +161,95 @@ class ZohoClient:
         json: Optional[Dict[str, Any]] = None,
         data: Optional[Dict[str, Any]] = None,
         files: Optional[Dict[str, Any]] = None,
+        content: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        `json` bodies are encoded with orjson; callers holding an already
+        serialized JSON body can pass it as `content` instead. `headers`
+        replace the JSON content headers for any other kind of body.
+        """
+        await self.get_access_token()
+
+        if json is not None:
+            content = _dumps(json)
+        if headers is not None:
+            headers = {**self._auth_headers, **headers}
+        else:
+            headers = self._auth_headers if content is None else self._json_headers
+
+        r = await self._get_client().request(
+            method,
+            path.lstrip("/"),
+            headers=headers,
+            params=params,
+            content=content,
+            data=data,
+            files=files,
+        )
+
+        if r.status_code >= 400:
+            # try JSON first; fallback to text
+            try:
+                err = _loads(r.content)
+            except Exception:
+                err = {"raw": r.text}
+            raise HTTPException(
+                status_code=502,
+                detail={"zoho_status": r.status_code, "zoho_error": err},
+            )
+
+        return _loads(r.content)
+
+    async def upload_attachment_file(
+        self,
+        resource: str,
+        resource_id: str,
+        path: str,
+        filename: str,
+        content_type: str,
     ) -> Dict[str, Any]:
-        token = await self.get_access_token()
-        headers = {"Authorization": f"Zoho-oauthtoken {token}"}
-
-        params = params or {}
-        params["organization_id"] = self.org_id
-
-        url = f"{self.books_base_url.rstrip('/')}/{path.lstrip('/')}"
-
-        async with httpx.AsyncClient(timeout=60) as client:
-            r = await client.request(
-                method,
-                url,
-                headers=headers,
-                params=params,
-                json=json,
-                data=data,
-                files=files,
+        """
+        Attach a file on disk to a Zoho record, e.g. resource="expenses" or
+        "journals", at most `zoho_max_concurrent_uploads` at a time. The
+        multipart body is streamed: the file is opened only once an upload
+        slot is free and read in `_UPLOAD_CHUNK` pieces in a worker thread,
+        so each upload holds one chunk in memory and no disk read runs on
+        the event loop.
+        """
+        async with self._upload_sem:
+            boundary = secrets.token_hex(16)
+            # Escape the filename so it can't break out of the header
+            quoted = (
+                filename.replace("\\", "\\\\")
+                .replace('"', "%22")
+                .replace("\r", "%0D")
+                .replace("\n", "%0A")
             )
+            head = (
+                f"--{boundary}\r\n"
+                f'Content-Disposition: form-data; name="attachment"; filename="{quoted}"\r\n'
+                f"Content-Type: {content_type}\r\n\r\n"
+            ).encode("utf-8")
+            tail = f"\r\n--{boundary}--\r\n".encode("ascii")
+            size = (await anyio.Path(path).stat()).st_size
 
-            if r.status_code >= 400:
-                # try JSON first; fallback to text
-                try:
-                    err = r.json()
-                except Exception:
-                    err = {"raw": r.text}
-                raise HTTPException(
-                    status_code=502,
-                    detail={"zoho_status": r.status_code, "zoho_error": err},
-                )
+            async def body() -> AsyncIterator[bytes]:
+                yield head
+                async with await anyio.open_file(path, "rb") as f:
+                    while chunk := await f.read(_UPLOAD_CHUNK):
+                        yield chunk
+                yield tail
 
-            return r.json()
+            return await self.request(
+                "POST",
+                f"/{resource}/{str(resource_id).strip()}/attachment",
+                content=body(),
+                headers={
+                    "Content-Type": f"multipart/form-data; boundary={boundary}",
+                    "Content-Length": str(len(head) + size + len(tail)),
+                },
+            )
 
 
 zoho = ZohoClient()
@@ -127,6 +267,7 @@ async def zoho_request(
     json: Optional[Dict[str, Any]] = None,
     data: Optional[Dict[str, Any]] = None,
     files: Optional[Dict[str, Any]] = None,
+    content: Optional[bytes] = None,
 ) -> Dict[str, Any]:
     return await zoho.request(
         method,
@@ -135,6 +276,7 @@ async def zoho_request(
         json=json,
         data=data,
         files=files,
+        content=content,
     )
 
 
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 
 from .core.config import settings
+from .core.zoho import zoho
 from .routers.assets import router as assets_router
 from .routers.expenses import router as expenses_router
 from .routers.pending import router as pending_router
@@ -17,8 +21,21 @@ from .routers.accrued import router as accrued_router
 from .routers.cash import router as cash_router  # ✅ ADDED
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Release pooled Zoho connections
+    await zoho.aclose()
+
+
 def create_app() -> FastAPI:
-    app = FastAPI(title="Asset Service", version="1.0.0")
+    app = FastAPI(
+        title="Asset Service",
+        version="1.0.0",
+        lifespan=lifespan,
+        # Encode every JSON response with orjson instead of stdlib json
+        default_response_class=ORJSONResponse,
+    )
 
     # API routers
     app.include_router(assets_router, prefix="/api/assets", tags=["assets"])
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
 from datetime import date
-import inspect
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 
+from ..core.access import filter_by_owner_or_cash_access
 from ..core.auth import get_current_user, require_admin, CurrentUser
+from ..core.schemas import PAYLOAD_CONFIG
 from ..services.coa_store import coa_store
 from ..services.pending_store import pending_store
 
@@ -13,6 +14,8 @@ router = APIRouter()
 
 
 class ClearingPayload(BaseModel):
+    model_config = PAYLOAD_CONFIG
+
     paid_through_account_id: str
     amount: float
     date: str | None = None  # YYYY-MM-DD
@@ -20,72 +23,6 @@ class ClearingPayload(BaseModel):
     description: str | None = None
 
 
-def _load_accrued_expense(expense_id: str) -> dict | None:
-    """
-    Best-effort loader. Prefer a direct getter if your PendingStore exposes one;
-    otherwise fallback to scanning list_accrued(include_cleared=True).
-    """
-    for getter_name in ("get_accrued", "get_accrued_expense", "find_accrued"):
-        getter = getattr(pending_store, getter_name, None)
-        if callable(getter):
-            try:
-                return getter(expense_id)
-            except TypeError:
-                # In case a getter expects different args, ignore and fallback.
-                pass
-
-    # Fallback: scan list
-    try:
-        items = pending_store.list_accrued(include_cleared=True)
-    except TypeError:
-        items = pending_store.list_accrued(True)
-
-    for e in items or []:
-        if str(e.get("id") or e.get("expense_id") or "") == str(expense_id):
-            return e
-    return None
-
-
-def _compute_balance(expense: dict) -> float | None:
-    """
-    Extract remaining balance from common keys; fallback to computing from amount - cleared.
-    If balance cannot be determined reliably, return None.
-    """
-    for key in ("balance", "remaining_balance", "remaining", "open_balance"):
-        if key in expense and expense[key] is not None:
-            try:
-                return float(expense[key])
-            except (TypeError, ValueError):
-                return None
-
-    amount = expense.get("amount")
-    if amount is None:
-        return None
-    try:
-        amount_f = float(amount)
-    except (TypeError, ValueError):
-        return None
-
-    # Common patterns for cleared totals
-    for cleared_key in ("cleared_total", "cleared_amount", "paid_total", "paid_amount"):
-        if cleared_key in expense and expense[cleared_key] is not None:
-            try:
-                return amount_f - float(expense[cleared_key])
-            except (TypeError, ValueError):
-                return None
-
-    # If there is a list of clearings/payments
-    for list_key in ("clearings", "payments", "clearing_payments"):
-        if isinstance(expense.get(list_key), list):
-            try:
-                cleared_sum = sum(float(x.get("amount", 0) or 0) for x in expense[list_key])
-                return amount_f - cleared_sum
-            except (TypeError, ValueError):
-                return None
-
-    return None
-
-
 @router.get("/expenses")
 def list_accrued(
     include_cleared: bool = False,
@@ -94,17 +31,7 @@ def list_accrued(
     items = pending_store.list_accrued(include_cleared=include_cleared)
 
     # 🔐 Restrict non-admin users
-    if not user.is_admin:
-        allowed = set(user.allowed_cash_accounts or [])
-        items = [
-            e for e in items
-            if (
-                e.get("created_by") == user.user_id
-                or e.get("paid_through_account_id") in allowed
-            )
-        ]
-
-    return {"accrued": items}
+    return {"accrued": filter_by_owner_or_cash_access(items, user)}
 
 
 @router.post("/{expense_id}/clear")
@@ -124,39 +51,41 @@ def clear_accrued(
     if amt <= 0:
         raise HTTPException(status_code=400, detail="Amount must be > 0")
 
-    paid_id = str(payload.paid_through_account_id or "").strip()
+    paid_id = payload.paid_through_account_id
     if not paid_id:
         raise HTTPException(status_code=400, detail="Paid through is required")
 
     # derive account name from COA
-    paid_name = ""
-    for r in coa_store.paid_through_accounts():
-        rid = (r.get("Account ID") or r.get("Account Id") or r.get("account_id") or "").strip()
-        if rid == paid_id:
-            paid_name = (r.get("Account Name") or r.get("account_name") or "").strip()
-            break
+    paid_name = coa_store.paid_through_by_id().get(paid_id, "")
+
+    # computed once, shared by the record and its Zoho payload
+    clear_date = payload.date or date.today().isoformat()
+    ref = payload.reference_number or ""
+    desc = payload.description or f"Clearing payment for accrued expense {expense_id}"
+    vendor_id = src.get("vendor_id")
+    vendor_name = src.get("vendor_name")
 
     created = pending_store.add_pending({
         "pending_kind": "accrued_payment",
         "expense_type": "accrued_payment",
-        "date": payload.date or date.today().isoformat(),
-        "vendor_id": src.get("vendor_id"),
-        "vendor_name": src.get("vendor_name"),
+        "date": clear_date,
+        "vendor_id": vendor_id,
+        "vendor_name": vendor_name,
         "amount": amt,
-        "reference_number": payload.reference_number or "",
+        "reference_number": ref,
         "paid_through_account_id": paid_id,
         "paid_through_account_name": paid_name,
-        "description": payload.description or f"Clearing payment for accrued expense {expense_id}",
+        "description": desc,
         "created_by": user.user_id,
         "source_accrued_expense_id": expense_id,
         "payload": {
-            "date": payload.date or date.today().isoformat(),
-            "vendor_id": src.get("vendor_id"),
-            "vendor_name": src.get("vendor_name"),
+            "date": clear_date,
+            "vendor_id": vendor_id,
+            "vendor_name": vendor_name,
             "amount": amt,
-            "reference_number": payload.reference_number or "",
+            "reference_number": ref,
             "paid_through_account_id": paid_id,
-            "description": payload.description or f"Clearing payment for accrued expense {expense_id}",
+            "description": desc,
         },
     })
 
@@ -166,20 +95,12 @@ def clear_accrued(
 @router.get("/payments")
 def list_payments_made(user: CurrentUser = Depends(get_current_user)):
     items = pending_store.list_payments_made(status="approved")
-
-    if not user.is_admin:
-        allowed = set(user.allowed_cash_accounts or [])
-        items = [
-            p for p in items
-            if (
-                p.get("created_by") == user.user_id
-                or p.get("paid_through_account_id") in allowed
-            )
-        ]
-    return {"payments": items}
+    return {"payments": filter_by_owner_or_cash_access(items, user)}
 
 
 class ClearingEditPayload(BaseModel):
+    model_config = PAYLOAD_CONFIG
+
     amount: float | None = None
     paid_through_account_id: str | None = None
     paid_through_account_name: str | None = None
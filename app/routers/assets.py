@@ -1,8 +1,17 @@
-from fastapi import APIRouter, Request, HTTPException
+import asyncio
+
+from typing import Any
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, TypeAdapter
+
 from app.core.zoho import zoho_request, zoho_json
 
 router = APIRouter()
 
+_ASSETS_PER_PAGE = 200
+_ASSETS_PAGE_CONCURRENCY = 8
+
 FIXED_ASSET_TYPE_MAP = {
     "COMPUTERS": {
         "fixed_asset_type_id": "5571826000000132005",
@@ -19,53 +28,67 @@ FIXED_ASSET_TYPE_MAP = {
 }
 
 
+class ZohoAssetBody(BaseModel):
+    """
+    Body for POST /fixedassets. Values from the request are passed through as-is.
+    """
+    asset_name: Any
+    fixed_asset_type_id: str
+    asset_account_id: str
+    expense_account_id: str
+    depreciation_account_id: str
+    asset_cost: Any
+    asset_purchase_date: Any
+    depreciation_start_date: Any
+    total_life: Any
+    salvage_value: Any = 0
+    dep_start_value: Any
+    depreciation_method: str = "straight_line"
+    depreciation_frequency: str = "monthly"
+    computation_type: str = "prorata_basis"
+
+
+# Built once; serializes straight to JSON bytes in pydantic-core
+_ZOHO_ASSET_ADAPTER = TypeAdapter(ZohoAssetBody)
+
+
+_REQUIRED_ASSET_FIELDS = (
+    "asset_name",
+    "asset_category",
+    "asset_cost",
+    "purchase_date",
+    "depreciation_start_date",
+    "useful_life_months",
+)
+_REQUIRED_ASSET_FIELDS_SET = frozenset(_REQUIRED_ASSET_FIELDS)
+
+
 @router.post("/assets/create")
-def create_asset(request: Request, payload: dict):
-    required = [
-        "asset_name",
-        "asset_category",
-        "asset_cost",
-        "purchase_date",
-        "depreciation_start_date",
-        "useful_life_months",
-    ]
-    missing = [f for f in required if f not in payload]
-    if missing:
+async def create_asset(payload: dict):
+    if not _REQUIRED_ASSET_FIELDS_SET.issubset(payload.keys()):
+        # keep the declared order in the error message
+        missing = [f for f in _REQUIRED_ASSET_FIELDS if f not in payload]
         raise HTTPException(400, f"Missing fields: {', '.join(missing)}")
 
-    category = payload["asset_category"]
-    if category not in FIXED_ASSET_TYPE_MAP:
+    m = FIXED_ASSET_TYPE_MAP.get(payload["asset_category"])
+    if m is None:
         raise HTTPException(400, "Invalid asset_category")
 
-    m = FIXED_ASSET_TYPE_MAP[category]
-    settings = request.app.state.settings
-
-    zoho_payload = {
-        "asset_name": payload["asset_name"],
-        "fixed_asset_type_id": m["fixed_asset_type_id"],
-        "asset_account_id": m["asset_account_id"],
-        "expense_account_id": m["expense_account_id"],
-        "depreciation_account_id": m["depreciation_account_id"],
-        "asset_cost": payload["asset_cost"],
-        "asset_purchase_date": payload["purchase_date"],
-        "depreciation_start_date": payload["depreciation_start_date"],
-        "total_life": payload["useful_life_months"],
-        "salvage_value": payload.get("salvage_value", 0),
-        "dep_start_value": payload["asset_cost"],
-        "depreciation_method": "straight_line",
-        "depreciation_frequency": "monthly",
-        "computation_type": "prorata_basis",
-    }
-
-    resp = zoho_request(
-        settings,
-        "POST",
-        "/fixedassets",
-        json=zoho_payload,
-        headers={"Content-Type": "application/json"},
-        timeout=30,
+    body = ZohoAssetBody(
+        asset_name=payload["asset_name"],
+        fixed_asset_type_id=m["fixed_asset_type_id"],
+        asset_account_id=m["asset_account_id"],
+        expense_account_id=m["expense_account_id"],
+        depreciation_account_id=m["depreciation_account_id"],
+        asset_cost=payload["asset_cost"],
+        asset_purchase_date=payload["purchase_date"],
+        depreciation_start_date=payload["depreciation_start_date"],
+        total_life=payload["useful_life_months"],
+        salvage_value=payload.get("salvage_value", 0),
+        dep_start_value=payload["asset_cost"],
     )
-    data = zoho_json(resp)
+
+    data = await zoho_request("POST", "/fixedassets", content=_ZOHO_ASSET_ADAPTER.dump_json(body))
 
     if data.get("code") != 0:
         raise HTTPException(400, data)
@@ -74,37 +97,58 @@ def create_asset(request: Request, payload: dict):
     return {"ok": True, "fixed_asset_id": fa["fixed_asset_id"], "asset_number": fa["asset_number"], "status": fa["status"]}
 
 
+async def _fetch_assets_page(page: int) -> dict:
+    data = await zoho_request(
+        "GET",
+        "/fixedassets",
+        params={"filter_by": "Status.All", "page": page, "per_page": _ASSETS_PER_PAGE},
+    )
+    if data.get("code") != 0:
+        raise HTTPException(400, data)
+    return data
+
+
+def _total_pages(page_context: dict) -> int | None:
+    pages = page_context.get("total_pages")
+    if pages:
+        return int(pages)
+    total = page_context.get("total")
+    if total:
+        return -(-int(total) // _ASSETS_PER_PAGE)
+    return None
+
+
 @router.get("/assets/all")
-def list_all_assets(request: Request):
-    settings = request.app.state.settings
-
-    page = 1
-    per_page = 200
-    all_assets = []
-
-    while True:
-        resp = zoho_request(
-            settings,
-            "GET",
-            "/fixedassets",
-            params={"filter_by": "Status.All", "page": page, "per_page": per_page},
-            timeout=30,
-        )
-        data = zoho_json(resp)
-        if data.get("code") != 0:
-            raise HTTPException(400, data)
-
-        all_assets.extend(data.get("fixed_assets", []))
-        page_context = data.get("page_context", {})
-        if not page_context.get("has_more_page"):
-            break
-        page += 1
+async def list_all_assets():
+    data = await _fetch_assets_page(1)
+    all_assets = list(data.get("fixed_assets", []))
+    page_context = data.get("page_context", {})
+    if not page_context.get("has_more_page"):
+        return {"ok": True, "count": len(all_assets), "assets": all_assets}
+
+    total_pages = _total_pages(page_context)
+    if total_pages:
+        # Page count known: fetch the rest concurrently, bounded for Zoho rate limits
+        sem = asyncio.Semaphore(_ASSETS_PAGE_CONCURRENCY)
+
+        async def fetch(p: int) -> dict:
+            async with sem:
+                return await _fetch_assets_page(p)
+
+        for d in await asyncio.gather(*(fetch(p) for p in range(2, total_pages + 1))):
+            all_assets.extend(d.get("fixed_assets", []))
+    else:
+        page = 2
+        while True:
+            data = await _fetch_assets_page(page)
+            all_assets.extend(data.get("fixed_assets", []))
+            if not data.get("page_context", {}).get("has_more_page"):
+                break
+            page += 1
 
     return {"ok": True, "count": len(all_assets), "assets": all_assets}
 
 
 @router.get("/assets/by-id/{asset_id}")
-def get_asset_by_id(request: Request, asset_id: str):
-    settings = request.app.state.settings
-    resp = zoho_request(settings, "GET", f"/fixedassets/{asset_id}", timeout=30)
-    return zoho_json(resp)
+async def get_asset_by_id(asset_id: str):
+    return await zoho_json("GET", f"/fixedassets/{asset_id}")
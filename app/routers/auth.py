@@ -3,47 +3,65 @@ from __future__ import annotations
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 from ..core.auth import get_current_user, require_admin, CurrentUser
+from ..core.schemas import PAYLOAD_CONFIG
 from ..services.auth_store import auth_store
 
 router = APIRouter()
 
+# Shared request-body config minus stripping, which would silently alter passwords
+_PAYLOAD_CONFIG = ConfigDict(PAYLOAD_CONFIG, str_strip_whitespace=False)
+
 
 # -----------------------
 # Schemas
 # -----------------------
 
 class LoginPayload(BaseModel):
+    model_config = _PAYLOAD_CONFIG
+
     email: str
     password: str
 
 
 class InvitePayload(BaseModel):
+    model_config = _PAYLOAD_CONFIG
+
     email: str
     role: str = Field(default="user")
     allowed_cash_accounts: List[str] = Field(default_factory=list)
 
 
 class AcceptInvitePayload(BaseModel):
+    model_config = _PAYLOAD_CONFIG
+
     invite_token: str
     password: str
 
 
 class CashAccessPayload(BaseModel):
+    model_config = _PAYLOAD_CONFIG
+
     allowed_cash_accounts: List[str]
 
 
 class RolePayload(BaseModel):
+    model_config = _PAYLOAD_CONFIG
+
     role: str
 
 
 class ActivePayload(BaseModel):
+    model_config = _PAYLOAD_CONFIG
+
     active: bool
 
 
 class PasswordPayload(BaseModel):
+    model_config = _PAYLOAD_CONFIG
+
     password: str
 
 
@@ -1,10 +1,13 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional, List
+import asyncio
+import time
+from typing import Any, Dict, List
 
 from fastapi import APIRouter, HTTPException, Depends, Query
 
 from app.core.auth import get_current_user, CurrentUser
+from app.core.utils import safe_float
 from app.core.zoho import zoho_request
 from app.services.pending_store import pending_store
 
@@ -15,15 +18,45 @@ router = APIRouter(prefix="/cash", tags=["cash"])
 # HELPERS
 # -------------------------------------------------------------------
 
-def _safe_float(v: Any) -> float:
-    try:
-        return float(v or 0)
-    except Exception:
-        return 0.0
+def _round2(v: float) -> float:
+    return round((v if type(v) is float else float(v)) + 1e-12, 2)
 
 
-def _round2(v: float) -> float:
-    return round(float(v) + 1e-12, 2)
+# Short-lived /bankaccounts cache shared by the dashboard and wings views;
+# the lock collapses concurrent misses into a single Zoho call.
+_BANK_TTL_S = 10.0
+_BANK_CACHE: Dict[str, Any] = {"at": 0.0, "data": None}
+_BANK_LOCK = asyncio.Lock()
+
+
+def _bank_cache_fresh() -> bool:
+    return _BANK_CACHE["data"] is not None and time.monotonic() - _BANK_CACHE["at"] < _BANK_TTL_S
+
+
+async def _bankaccounts() -> tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """
+    (accounts, {account_id: account}) from Zoho /bankaccounts, cached briefly.
+    """
+    if _bank_cache_fresh():
+        return _BANK_CACHE["data"]
+    async with _BANK_LOCK:
+        if _bank_cache_fresh():
+            return _BANK_CACHE["data"]
+        resp = await zoho_request("GET", "/bankaccounts")
+        accounts = resp.get("bankaccounts", [])
+        data = (accounts, {str(a.get("account_id")): a for a in accounts})
+        if resp.get("code", 0) == 0:
+            _BANK_CACHE.update(at=time.monotonic(), data=data)
+        return data
+
+
+async def invalidate_bank_cache() -> None:
+    """
+    Drop the cached /bankaccounts response, e.g. after posting to Zoho, so
+    the next dashboard read doesn't pair a stale balance with new pending totals.
+    """
+    async with _BANK_LOCK:
+        _BANK_CACHE.update(at=0.0, data=None)
 
 
 # -------------------------------------------------------------------
@@ -32,23 +65,23 @@ def _round2(v: float) -> float:
 
 @router.get("")
 async def get_cash_dashboard(user: CurrentUser = Depends(get_current_user)):
-    resp = await zoho_request("GET", "/bankaccounts")
-    accounts = resp.get("bankaccounts", [])
+    accounts, _ = await _bankaccounts()
 
     # Restrict non-admins
     if not user.is_admin:
-        allowed = set(user.allowed_cash_accounts or [])
+        allowed = user.allowed_cash_accounts_set
         accounts = [
             a for a in accounts
             if str(a.get("account_id")) in allowed
         ]
 
     cashboxes = []
+    totals = pending_store.pending_totals_by_account()
 
     for acct in accounts:
         account_id = str(acct.get("account_id"))
-        balance = _safe_float(acct.get("balance"))
-        pending = pending_store.pending_total_for_account(account_id)
+        balance = safe_float(acct.get("balance"))
+        pending = totals.get(account_id, 0.0)
 
         cashboxes.append({
             "account_id": account_id,
@@ -72,24 +105,19 @@ async def get_wings_cash(
 ):
     # Permission check
     if not user.is_admin:
-        if account_id not in (user.allowed_cash_accounts or []):
+        if account_id not in user.allowed_cash_accounts_set:
             raise HTTPException(
                 status_code=403,
                 detail="You do not have access to this cash account",
             )
 
-    resp = await zoho_request("GET", "/bankaccounts")
-    accounts = resp.get("bankaccounts", [])
-
-    acct = next(
-        (a for a in accounts if str(a.get("account_id")) == str(account_id)),
-        None,
-    )
+    _, by_id = await _bankaccounts()
+    acct = by_id.get(str(account_id))
 
     if not acct:
         raise HTTPException(status_code=404, detail="Cash account not found")
 
-    balance = _safe_float(acct.get("balance"))
+    balance = safe_float(acct.get("balance"))
     pending = pending_store.pending_total_for_account(account_id)
 
     return {
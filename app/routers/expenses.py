@@ -1,15 +1,21 @@
 from __future__ import annotations
 
+import base64
+import binascii
+import time
 from datetime import date
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 
-from ..core.auth import get_current_user, require_admin, CurrentUser
+from ..core.auth import get_current_user, CurrentUser
 from ..core.config import settings
+from ..core.schemas import PAYLOAD_CONFIG
 from ..core.zoho import zoho
-from ..core.utils import ensure_ok_zoho
+from ..core.utils import ensure_ok_zoho, safe_float
 from ..services.coa_store import coa_store
 from ..services.pending_store import pending_store
 
@@ -21,6 +27,8 @@ router = APIRouter()
 # =========================================================
 
 class ExpenseCreate(BaseModel):
+    model_config = PAYLOAD_CONFIG
+
     expense_type: str = "ordinary"  # ordinary | accrued
 
     vendor_id: Optional[str] = None
@@ -45,17 +53,81 @@ def _today_str() -> str:
     return date.today().isoformat()
 
 
-def _safe_float(v: Any) -> float:
+_VALID_EXP_TYPES = frozenset({"ordinary", "accrued"})
+
+# Record fields mirrored into the raw payload on edit
+_PAYLOAD_SYNC_FIELDS = frozenset({
+    "amount",
+    "reference_number",
+    "paid_through_account_id",
+    "expense_account_id",
+    "date",
+    "description",
+    "vendor_id",
+    "vendor_name",
+})
+
+
+# /approved pages are capped at this many rows
+_APPROVED_MAX_LIMIT = 100
+
+
+def _approved_key(rec: Dict[str, Any]) -> Tuple[int, str]:
+    # Same order as pending_store.list_approved (newest first)
+    return (rec.get("approved_at") or 0, str(rec.get("expense_id") or ""))
+
+
+def _encode_cursor(rec: Dict[str, Any]) -> str:
+    raw = orjson.dumps(list(_approved_key(rec)))
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> Tuple[int, str]:
     try:
-        return float(v or 0)
-    except Exception:
-        return 0.0
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        approved_at, expense_id = orjson.loads(raw)
+        return (int(approved_at), str(expense_id))
+    except (binascii.Error, orjson.JSONDecodeError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+# Per-(user, range) results of the /approved store scan + permission filter.
+# Entries are dropped once the store has been written to or the TTL lapses.
+_APPROVED_CACHE_TTL_S = 30.0
+_APPROVED_CACHE_MAX = 256
+_approved_cache: Dict[tuple, Tuple[float, int, list]] = {}
+
+
+def _approved_for(user: CurrentUser, start_date: str | None, end_date: str | None) -> list:
+    user_key = "admin" if user.is_admin else (user.user_id, user.allowed_cash_accounts_set)
+    key = (user_key, start_date, end_date)
+    now = time.monotonic()
+    version = pending_store.version
+
+    hit = _approved_cache.get(key)
+    if hit is not None and hit[1] == version and now - hit[0] < _APPROVED_CACHE_TTL_S:
+        return hit[2]
+
+    # 🔐 Restrict non-admin users (applied inside the store scan)
+    admin = user.is_admin
+    items = pending_store.list_approved(
+        start_date=start_date,
+        end_date=end_date,
+        default_current_month=True,
+        created_by=None if admin else user.user_id,
+        paid_through_in=None if admin else user.allowed_cash_accounts_set,
+    )
+
+    if len(_approved_cache) >= _APPROVED_CACHE_MAX:
+        _approved_cache.clear()
+    _approved_cache[key] = (now, version, items)
+    return items
 
 
 def _recompute_accrued_balance(rec: Dict[str, Any]) -> None:
-    amt = _safe_float(rec.get("amount"))
+    amt = safe_float(rec.get("amount"))
     clearing = rec.get("clearing") or []
-    cleared_total = sum(_safe_float(c.get("amount")) for c in clearing)
+    cleared_total = sum(safe_float(c.get("amount")) for c in clearing)
     bal = max(0.0, amt - cleared_total)
     rec["balance"] = round(bal, 2)
     if rec["balance"] <= 0:
@@ -91,39 +163,30 @@ async def create_expense(
     payload: ExpenseCreate,
     user: CurrentUser = Depends(get_current_user),
 ):
-    exp_type = (payload.expense_type or "ordinary").strip().lower()
-    if exp_type not in ("ordinary", "accrued"):
-        exp_type = "ordinary"
+    exp_type = payload.expense_type or "ordinary"
+    if exp_type not in _VALID_EXP_TYPES:
+        # only normalize when the raw value isn't already canonical
+        exp_type = exp_type.strip().lower()
+        if exp_type not in _VALID_EXP_TYPES:
+            exp_type = "ordinary"
 
     paid_through_id = payload.paid_through_account_id
     paid_through_name = ""
 
     # Enforce accrued paid-through
     if exp_type == "accrued":
-        acc = coa_store.accrued_paid_through_account()
-        if not acc:
+        ref = coa_store.accrued_paid_through_ref()
+        if not ref:
             raise HTTPException(
                 status_code=400,
                 detail="Accrued Expenses account not found in COA",
             )
 
-        paid_through_id = (
-            acc.get("Account ID")
-            or acc.get("Account Id")
-            or acc.get("account_id")
-            or ""
-        ).strip()
-
-        paid_through_name = (
-            acc.get("Account Name")
-            or acc.get("account_name")
-            or "Accrued Expenses"
-        )
+        paid_through_id, paid_through_name = ref
 
     # 🔐 ENFORCE CASH ACCESS (ORDINARY ONLY)
     if not user.is_admin and exp_type != "accrued":
-        allowed = user.allowed_cash_accounts or []
-        if paid_through_id not in allowed:
+        if paid_through_id not in user.allowed_cash_accounts_set:
             raise HTTPException(
                 status_code=403,
                 detail="You are not allowed to use this paid-through account",
@@ -141,24 +204,27 @@ async def create_expense(
             detail="Select a vendor or enter vendor name",
         )
 
+    # One dump, reused for the record fields and kept as the raw payload
+    data = payload.model_dump()
     record: Dict[str, Any] = {
         "status": "pending",
         "expense_type": exp_type,
-        "date": payload.date or _today_str(),
-        "vendor_id": payload.vendor_id,
-        "vendor_name": payload.vendor_name or "",
-        "reference_number": payload.reference_number or "",
-        "expense_account_id": payload.expense_account_id,
+        "date": data["date"] or _today_str(),
+        "vendor_id": data["vendor_id"],
+        "vendor_name": data["vendor_name"] or "",
+        "reference_number": data["reference_number"] or "",
+        "expense_account_id": data["expense_account_id"],
         "paid_through_account_id": paid_through_id,
         "paid_through_account_name": paid_through_name,
-        "amount": float(payload.amount),
-        "description": payload.description or "",
-        "tax_id": payload.tax_id,
+        "amount": float(data["amount"]),
+        "description": data["description"] or "",
+        "tax_id": data["tax_id"],
         "created_by": user.user_id,
-        "payload": payload.dict(),
+        "payload": data,
     }
 
-    created = pending_store.add_pending(record)
+    # Locked JSON file write; keep it off the event loop
+    created = await run_in_threadpool(pending_store.add_pending, record)
     return {"ok": True, "expense": created}
 
 
@@ -170,26 +236,29 @@ async def create_expense(
 def list_approved(
     start_date: str | None = None,
     end_date: str | None = None,
+    cursor: str | None = None,
+    limit: int | None = Query(default=None, ge=1),
     user: CurrentUser = Depends(get_current_user),
 ):
-    items = pending_store.list_approved(
-        start_date=start_date,
-        end_date=end_date,
-        default_current_month=True,
-    )
+    """
+    Without cursor/limit the whole range is returned, as before. With either,
+    results are paged newest-first by (approved_at, expense_id); pass the
+    returned next_cursor (with the same dates) to fetch the following page.
+    """
+    items = _approved_for(user, start_date, end_date)
 
-    # 🔐 Restrict non-admin users
-    if not user.is_admin:
-        allowed = set(user.allowed_cash_accounts or [])
-        items = [
-            e for e in items
-            if (
-                e.get("created_by") == user.user_id
-                or e.get("paid_through_account_id") in allowed
-            )
-        ]
+    if cursor is None and limit is None:
+        return {"approved": items}
 
-    return {"approved": items}
+    page_size = min(limit or _APPROVED_MAX_LIMIT, _APPROVED_MAX_LIMIT)
+    if cursor is not None:
+        after = _decode_cursor(cursor)
+        items = [e for e in items if _approved_key(e) < after]
+
+    # one extra row tells us whether another page exists
+    page = items[: page_size + 1]
+    next_cursor = _encode_cursor(page[page_size - 1]) if len(page) > page_size else None
+    return {"approved": page[:page_size], "next_cursor": next_cursor}
 
 
 # =========================================================
@@ -207,9 +276,7 @@ def get_expense(
 
     # 🔐 Restrict non-admin users
     if not user.is_admin:
-        if exp.get("paid_through_account_id") not in (
-            user.allowed_cash_accounts or []
-        ):
+        if exp.get("paid_through_account_id") not in user.allowed_cash_accounts_set:
             raise HTTPException(status_code=403, detail="Not allowed")
 
     return {"expense": exp}
@@ -225,59 +292,39 @@ def update_expense(
     patch: Dict[str, Any],
     user: CurrentUser = Depends(get_current_user),
 ):
-    exp = pending_store.get(expense_id)
-    if not exp:
-        raise HTTPException(status_code=404, detail="Expense not found")
-
-    # permissions:
-    # - admin can edit anything
-    # - user can only edit their own pending items
-    if not user.is_admin:
-        if exp.get("status") != "pending":
-            raise HTTPException(status_code=403, detail="Only pending expenses can be edited")
-        if exp.get("created_by") != user.user_id:
-            raise HTTPException(status_code=403, detail="Not your expense")
-
-    updates = dict(patch or {})
-
-    # Sync edits into raw payload so approve won't post stale values
-    payload = (exp.get("payload") if isinstance(exp.get("payload"), dict) else {}) or {}
-
-    if "amount" in updates:
-        payload["amount"] = updates["amount"]
-    if "reference_number" in updates:
-        payload["reference_number"] = updates["reference_number"]
-    if "paid_through_account_id" in updates:
-        payload["paid_through_account_id"] = updates["paid_through_account_id"]
-    if "expense_account_id" in updates:
-        payload["expense_account_id"] = updates["expense_account_id"]
-    if "date" in updates:
-        payload["date"] = updates["date"]
-    if "description" in updates:
-        payload["description"] = updates["description"]
-    if "vendor_id" in updates:
-        payload["vendor_id"] = updates["vendor_id"]
-    if "vendor_name" in updates:
-        payload["vendor_name"] = updates["vendor_name"]
-
-    updates["payload"] = payload
-
-    # If accrued expense amount changed, recompute balance
-    exp_type = (exp.get("expense_type") or "").lower()
-    if exp_type == "accrued" and "amount" in updates:
-        tmp = dict(exp)
-        tmp.update(updates)
-        _recompute_accrued_balance(tmp)
-        updates["balance"] = tmp.get("balance")
-        updates["cleared_at"] = tmp.get("cleared_at")
-
-    updated = (
-        pending_store.update_fields(expense_id, updates)
-        if user.is_admin
-        else pending_store.update(expense_id, updates)
-    )
+    def _apply(exp: Dict[str, Any]) -> Dict[str, Any]:
+        # Runs under the store lock: checks and write see the same record
+
+        # permissions:
+        # - admin can edit anything
+        # - user can only edit their own pending items
+        if not user.is_admin:
+            if exp.get("status") != "pending":
+                raise HTTPException(status_code=403, detail="Only pending expenses can be edited")
+            if exp.get("created_by") != user.user_id:
+                raise HTTPException(status_code=403, detail="Not your expense")
+
+        updates = dict(patch or {})
+
+        # Sync edits into raw payload so approve won't post stale values
+        payload = (exp.get("payload") if isinstance(exp.get("payload"), dict) else {}) or {}
+        payload.update({k: updates[k] for k in updates.keys() & _PAYLOAD_SYNC_FIELDS})
+        updates["payload"] = payload
+
+        # If accrued expense amount changed, recompute balance
+        exp_type = (exp.get("expense_type") or "").lower()
+        if exp_type == "accrued" and "amount" in updates:
+            tmp = dict(exp)
+            tmp.update(updates)
+            _recompute_accrued_balance(tmp)
+            updates["balance"] = tmp.get("balance")
+            updates["cleared_at"] = tmp.get("cleared_at")
+
+        return updates
+
+    updated = pending_store.get_and_update(expense_id, _apply)
     if not updated:
-        raise HTTPException(status_code=400, detail="Update failed")
+        raise HTTPException(status_code=404, detail="Expense not found")
 
     return {"ok": True, "expense": updated}
 
@@ -291,15 +338,13 @@ def delete_expense(
     expense_id: str,
     user: CurrentUser = Depends(get_current_user),
 ):
-    exp = pending_store.get(expense_id)
-    if not exp:
+    def _check(exp: Dict[str, Any]) -> None:
+        if not user.is_admin:
+            if exp.get("status") != "pending":
+                raise HTTPException(status_code=403, detail="Only pending expenses can be deleted")
+            if exp.get("created_by") != user.user_id:
+                raise HTTPException(status_code=403, detail="Not your expense")
+
+    if not pending_store.get_and_delete(expense_id, _check):
         raise HTTPException(status_code=404, detail="Expense not found")
-
-    if not user.is_admin:
-        if exp.get("status") != "pending":
-            raise HTTPException(status_code=403, detail="Only pending expenses can be deleted")
-        if exp.get("created_by") != user.user_id:
-            raise HTTPException(status_code=403, detail="Not your expense")
-
-    pending_store.delete(expense_id)
     return {"ok": True}
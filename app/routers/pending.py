@@ -1,31 +1,47 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import os
-import mimetypes
+import time
 from typing import Optional
 
-import httpx
-from fastapi import APIRouter, Depends, HTTPException
+import anyio
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 
+from ..core.access import filter_by_owner_or_cash_access
 from ..core.auth import get_current_user, require_admin, CurrentUser
 from ..core.config import settings
+from ..core.schemas import PAYLOAD_CONFIG
+from ..core.utils import guess_content_type
 from ..core.zoho import zoho_json, zoho
 from ..services.pending_store import pending_store
 from ..services.coa_store import coa_store
+from .cash import invalidate_bank_cache
 
 router = APIRouter()
 
+# Part of every ETag so a restart (store version back to 0) can't collide
+_BOOT_ID = format(time.time_ns(), "x")
+
 
 class ApprovePayload(BaseModel):
+    model_config = PAYLOAD_CONFIG
+
     expense_id: str
 
 
 class RejectPayload(BaseModel):
+    model_config = PAYLOAD_CONFIG
+
     expense_id: str
 
 
 class AdminUpdatePayload(BaseModel):
+    model_config = PAYLOAD_CONFIG
+
     date: Optional[str] = None
     vendor_id: Optional[str] = None
     vendor_name: Optional[str] = None
@@ -36,23 +52,34 @@ class AdminUpdatePayload(BaseModel):
     paid_through_account_name: Optional[str] = None
 
 
+def _pending_etag(user: CurrentUser) -> str:
+    # Content only changes with the store version and the caller's scope
+    if user.is_admin:
+        scope = "admin"
+    else:
+        scope = "|".join([str(user.user_id), *sorted(user.allowed_cash_accounts_set)])
+    digest = hashlib.blake2b(scope.encode("utf-8"), digest_size=8).hexdigest()
+    return f'W/"{_BOOT_ID}-{pending_store.version}-{digest}"'
+
+
 @router.get("/expenses")
-def list_pending(user: CurrentUser = Depends(get_current_user)):
+async def list_pending(
+    request: Request,
+    response: Response,
+    user: CurrentUser = Depends(get_current_user),
+):
+    # Pollers send back the ETag; unchanged store + same scope -> 304, no body
+    etag = _pending_etag(user)
+    inm = request.headers.get("if-none-match")
+    if inm and etag in (t.strip() for t in inm.split(",")):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
     # IMPORTANT: Only pending items must show here
-    items = pending_store.list_pending()
+    items = await run_in_threadpool(pending_store.list_pending)
 
     # ✅ FIX: restrict non-admin users to their allowed cash accounts
-    if not user.is_admin:
-        allowed = set(user.allowed_cash_accounts or [])
-        items = [
-            p for p in items
-            if (
-                p.get("created_by") == user.user_id
-                or p.get("paid_through_account_id") in allowed
-            )
-        ]
-
-    return {"pending": items}
+    return {"pending": filter_by_owner_or_cash_access(items, user)}
 
 
 @router.patch("/expenses/{expense_id}/admin_update")
@@ -67,80 +94,94 @@ def admin_update(expense_id: str, patch: AdminUpdatePayload, _: CurrentUser = De
     return {"ok": True, "expense": updated}
 
 
+# (Zoho field, pending record field); empty values are left out of the payload
+_ZOHO_EXPENSE_FIELDS = (
+    ("date", "date"),
+    ("account_id", "expense_account_id"),
+    ("paid_through_account_id", "paid_through_account_id"),
+    ("amount", "amount"),
+    ("reference_number", "reference_number"),
+    ("description", "description"),
+)
+_REQUIRED_ZOHO_EXPENSE_FIELDS = ("date", "account_id", "paid_through_account_id", "amount")
+
+
 def _build_zoho_expense_payload(rec: dict) -> dict:
     """
     Build payload for Zoho /expenses.
     IMPORTANT: use the edited record fields first (not stale payload).
     """
-    vendor_id = rec.get("vendor_id")
-    vendor_name = rec.get("vendor_name")
-
-    zoho_payload = {
-        "date": rec.get("date") or None,
-        "account_id": rec.get("expense_account_id") or None,
-        "paid_through_account_id": rec.get("paid_through_account_id") or None,
-        "amount": rec.get("amount"),
-        "reference_number": rec.get("reference_number") or None,
-        "description": rec.get("description") or "",
-    }
+    zoho_payload = {}
+    for zoho_key, rec_key in _ZOHO_EXPENSE_FIELDS:
+        v = rec.get(rec_key)
+        if v is not None and v != "":
+            zoho_payload[zoho_key] = v
 
+    vendor_id = rec.get("vendor_id")
     if vendor_id:
         zoho_payload["vendor_id"] = vendor_id
-    elif vendor_name:
-        zoho_payload["vendor_name"] = vendor_name
+    else:
+        vendor_name = rec.get("vendor_name")
+        if vendor_name:
+            zoho_payload["vendor_name"] = vendor_name
 
-    return {k: v for k, v in zoho_payload.items() if v is not None and v != ""}
+    return zoho_payload
 
 
 async def _push_journal_attachments(journal_id: str, expense_id: str, receipts: list):
     if not journal_id or not receipts:
         return
 
-    token = await zoho.get_access_token()
-    params = {"organization_id": zoho.org_id} if zoho.org_id else {}
-    url = f"{zoho.books_base_url.rstrip('/')}/journals/{str(journal_id).strip()}/attachment"
-    headers = {"Authorization": f"Zoho-oauthtoken {token}"}
+    base_dir = os.path.join(settings.uploads_dir, str(expense_id))
 
-    errors = []
-    for r in receipts:
+    async def _upload_one(r: dict) -> Optional[str]:
         filename = (r or {}).get("filename") or ""
         if not filename:
-            continue
+            return None
 
-        local_path = os.path.join(settings.uploads_dir, str(expense_id), filename)
-        if not os.path.exists(local_path):
-            errors.append(f"Missing local file: {filename}")
-            continue
+        local_path = f"{base_dir}/{filename}"
+        # stat runs in a worker thread so a slow disk doesn't stall the loop
+        if not await anyio.Path(local_path).exists():
+            return f"Missing local file: {filename}"
 
-        ctype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        ctype = guess_content_type(filename)
         try:
-            with open(local_path, "rb") as f:
-                files = {"attachment": (filename, f, ctype)}
-                async with httpx.AsyncClient(timeout=60) as client:
-                    resp = await client.post(url, headers=headers, params=params, files=files)
-                    resp.raise_for_status()
+            # Read inside the upload slot, off the loop, on the shared client
+            await zoho.upload_attachment_file("journals", journal_id, local_path, filename, ctype)
         except Exception as e:
-            errors.append(f"{filename}: {str(e)}")
+            return f"{filename}: {str(e)}"
+        return None
+
+    # Receipts go up concurrently; upload_attachment_file caps how many are in
+    # flight. gather keeps results in receipt order for the error summary.
+    results = await asyncio.gather(*(_upload_one(r) for r in receipts))
+    errors = [e for e in results if e]
 
     if errors:
-        pending_store.update_fields(expense_id, {
+        await run_in_threadpool(pending_store.update_fields, expense_id, {
             "zoho_attachment_posted": False,
             "zoho_attachment_error": "; ".join(errors),
         })
     else:
-        pending_store.update_fields(expense_id, {
+        await run_in_threadpool(pending_store.update_fields, expense_id, {
             "zoho_attachment_posted": True,
             "zoho_attachment_error": "",
         })
 
 
 @router.post("/expenses/approve")
-async def approve(payload: ApprovePayload, _: CurrentUser = Depends(require_admin)):
+async def approve(
+    payload: ApprovePayload,
+    background: BackgroundTasks,
+    _: CurrentUser = Depends(require_admin),
+):
     expense_id = str(payload.expense_id or "").strip()
     if not expense_id:
         raise HTTPException(status_code=400, detail="expense_id is required")
 
-    rec = pending_store.get(expense_id)
+    # Even reads take the store lock, which a threadpool _save may hold
+    # across its file write, so they stay off the loop too
+    rec = await run_in_threadpool(pending_store.get, expense_id)
     if not rec:
         raise HTTPException(status_code=404, detail="Pending expense not found")
 
@@ -153,28 +194,34 @@ async def approve(payload: ApprovePayload, _: CurrentUser = Depends(require_admi
     # A) Normal expenses -> Zoho /expenses
     # -------------------------------------------------------
     if pending_kind == "expense":
+        # Zoho rejects these anyway; fail here instead of spending a round-trip
+        zoho_payload = _build_zoho_expense_payload(rec)
+        missing = [k for k in _REQUIRED_ZOHO_EXPENSE_FIELDS if k not in zoho_payload]
+        if missing:
+            raise HTTPException(status_code=400, detail={"missing": missing})
+
         try:
-            zoho_payload = _build_zoho_expense_payload(rec)
             zoho_resp = await zoho_json("POST", "/expenses", json=zoho_payload)
         except Exception as e:
-            pending_store.update_fields(expense_id, {
+            await run_in_threadpool(pending_store.update_fields, expense_id, {
                 "zoho_posted": False,
                 "zoho_error": str(e),
             })
             raise HTTPException(status_code=502, detail=f"Zoho post failed: {str(e)}")
 
+        # Zoho balances moved; the cash dashboard must refetch them
+        await invalidate_bank_cache()
+
         zoho_expense_id = (zoho_resp.get("expense") or {}).get("expense_id") or zoho_resp.get("expense_id")
-        ok = pending_store.approve(expense_id, zoho_response=zoho_resp)
-        if not ok:
+        updated = await run_in_threadpool(
+            pending_store.approve,
+            expense_id,
+            zoho_response=zoho_resp,
+            fields={"zoho_expense_id": zoho_expense_id, "zoho_error": ""},
+        )
+        if not updated:
             raise HTTPException(status_code=500, detail="Unable to mark approved")
 
-        updated = pending_store.update_fields(expense_id, {
-            "zoho_posted": True,
-            "zoho_expense_id": zoho_expense_id,
-            "zoho_response": zoho_resp,
-            "zoho_error": "",
-        })
-
         # push attachments after approval (keep your existing expense attachment logic)
         return {"ok": True, "expense": updated, "zoho_expense_id": zoho_expense_id}
 
@@ -183,21 +230,16 @@ async def approve(payload: ApprovePayload, _: CurrentUser = Depends(require_admi
     # -------------------------------------------------------
     if pending_kind == "accrued_payment":
         source_id = (rec.get("source_accrued_expense_id") or rec.get("source_expense_id") or "").strip()
-        src = pending_store.get(source_id) if source_id else None
+        src = await run_in_threadpool(pending_store.get, source_id) if source_id else None
 
         if (not src) or (src.get("status") != "approved") or ((src.get("expense_type") or "").lower() != "accrued"):
             raise HTTPException(status_code=400, detail="Invalid source accrued expense for clearing payment")
 
-        accrued_row = coa_store.accrued_paid_through_account()
-        if not accrued_row:
+        accrued_ref = coa_store.accrued_paid_through_ref()
+        if not accrued_ref:
             raise HTTPException(status_code=400, detail="Accrued Expenses account not found in COA CSV")
 
-        accrued_account_id = (
-            accrued_row.get("Account ID")
-            or accrued_row.get("Account Id")
-            or accrued_row.get("account_id")
-            or ""
-        ).strip()
+        accrued_account_id = accrued_ref[0]
 
         cash_account_id = str(rec.get("paid_through_account_id") or "").strip()
         if not cash_account_id:
@@ -232,27 +274,24 @@ async def approve(payload: ApprovePayload, _: CurrentUser = Depends(require_admi
         try:
             zoho_resp = await zoho_json("POST", "/journals", json=journal_payload)
         except Exception as e:
-            pending_store.update_fields(expense_id, {
+            await run_in_threadpool(pending_store.update_fields, expense_id, {
                 "zoho_posted": False,
                 "zoho_error": str(e),
             })
             raise HTTPException(status_code=502, detail=f"Zoho journal create failed: {str(e)}")
 
-        journal_id = ((zoho_resp.get("journal") or {}).get("journal_id") or "").strip()
-
-        ok = pending_store.approve(expense_id, zoho_response=zoho_resp)
-        if not ok:
-            raise HTTPException(status_code=500, detail="Unable to mark approved")
+        # Zoho balances moved; the cash dashboard must refetch them
+        await invalidate_bank_cache()
 
-        updated = pending_store.update_fields(expense_id, {
-            "zoho_posted": True,
-            "zoho_journal_id": journal_id,
-            "zoho_response": zoho_resp,
-            "zoho_error": "",
-        })
+        journal_id = ((zoho_resp.get("journal") or {}).get("journal_id") or "").strip()
 
-        pending_store.clear_accrued(
+        # Approval and the source's clearing entry land in one store write
+        updated = await run_in_threadpool(
+            pending_store.approve_accrued_payment,
+            expense_id,
             source_id,
+            zoho_response=zoho_resp,
+            fields={"zoho_journal_id": journal_id, "zoho_error": ""},
             amount=amt,
             paid_through_account_id=cash_account_id,
             paid_through_account_name=rec.get("paid_through_account_name") or "",
@@ -261,10 +300,14 @@ async def approve(payload: ApprovePayload, _: CurrentUser = Depends(require_admi
             source_payment_id=expense_id,
             receipts=(rec.get("receipts") or []),
         )
+        if not updated:
+            raise HTTPException(status_code=500, detail="Unable to mark approved")
 
+        # Receipts sync after the response is sent; the task records
+        # zoho_attachment_posted / zoho_attachment_error on the record
         receipts = (updated or {}).get("receipts") or []
         if journal_id and receipts:
-            await _push_journal_attachments(journal_id, expense_id, receipts)
+            background.add_task(_push_journal_attachments, journal_id, expense_id, receipts)
 
         return {"ok": True, "expense": updated, "zoho_journal_id": journal_id}
 
@@ -1,19 +1,21 @@
 from __future__ import annotations
 
-import mimetypes
 import os
 import time
 
-import httpx
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
 
 from ..core.auth import get_current_user, CurrentUser
 from ..core.config import settings
+from ..core.utils import ensure_dir, guess_content_type
 from ..core.zoho import zoho
 from ..services.pending_store import pending_store
 
 router = APIRouter()
 
+_UPLOAD_CHUNK = 1 << 20
+
 
 @router.post("/upload/{expense_id}")
 async def upload_receipt(
@@ -21,7 +23,7 @@ async def upload_receipt(
     file: UploadFile = File(...),
     user: CurrentUser = Depends(get_current_user),
 ):
-    exp = pending_store.get(expense_id)
+    exp = await run_in_threadpool(pending_store.get, expense_id)
     if not exp:
         raise HTTPException(status_code=404, detail="Expense not found")
 
@@ -42,22 +44,28 @@ async def upload_receipt(
                 detail="Not your expense",
             )
 
-    os.makedirs(settings.uploads_dir, exist_ok=True)
     safe_name = (file.filename or "receipt").replace("\\", "_").replace("/", "_")
     folder = os.path.join(settings.uploads_dir, str(expense_id))
-    os.makedirs(folder, exist_ok=True)
+    ensure_dir(folder)
 
     ts = int(time.time())
     stored_name = f"{ts}_{safe_name}"
     path = os.path.join(folder, stored_name)
 
-    content = await file.read()
-    with open(path, "wb") as f:
-        f.write(content)
+    # Copy the upload to disk in chunks instead of buffering it whole; the
+    # blocking disk I/O (file writes, store saves) runs in the threadpool so
+    # the event loop keeps serving other requests meanwhile
+    fh = await run_in_threadpool(open, path, "wb")
+    try:
+        while chunk := await file.read(_UPLOAD_CHUNK):
+            await run_in_threadpool(fh.write, chunk)
+    finally:
+        await run_in_threadpool(fh.close)
 
     # Served via /uploads mount
     url = f"/uploads/{expense_id}/{stored_name}"
-    updated = pending_store.add_receipt(
+    updated = await run_in_threadpool(
+        pending_store.add_receipt,
         expense_id,
         filename=stored_name,
         url=url,
@@ -79,40 +87,25 @@ async def upload_receipt(
 
     if status == "approved" and (zoho_expense_id or zoho_journal_id):
         try:
-            token = await zoho.get_access_token()
-            params = {"organization_id": zoho.org_id} if zoho.org_id else {}
-            headers = {"Authorization": f"Zoho-oauthtoken {token}"}
-
-            ctype = mimetypes.guess_type(stored_name)[0] or "application/octet-stream"
-            files = {"attachment": (stored_name, content, ctype)}
+            ctype = guess_content_type(stored_name)
 
+            # Same streamed, off-loop upload path as approved journal receipts
             if zoho_expense_id:
-                attach_url = (
-                    f"{zoho.books_base_url.rstrip('/')}"
-                    f"/expenses/{str(zoho_expense_id).strip()}/attachment"
+                await zoho.upload_attachment_file(
+                    "expenses", zoho_expense_id, path, stored_name, ctype
                 )
             else:
-                attach_url = (
-                    f"{zoho.books_base_url.rstrip('/')}"
-                    f"/journals/{str(zoho_journal_id).strip()}/attachment"
-                )
-
-            async with httpx.AsyncClient(timeout=60) as client:
-                r = await client.post(
-                    attach_url,
-                    headers=headers,
-                    params=params,
-                    files=files,
+                await zoho.upload_attachment_file(
+                    "journals", zoho_journal_id, path, stored_name, ctype
                 )
-                r.raise_for_status()
 
-            pending_store.update_fields(expense_id, {
+            await run_in_threadpool(pending_store.update_fields, expense_id, {
                 "zoho_attachment_posted": True,
                 "zoho_attachment_error": "",
             })
 
         except Exception as e:
-            pending_store.update_fields(expense_id, {
+            await run_in_threadpool(pending_store.update_fields, expense_id, {
                 "zoho_attachment_posted": False,
                 "zoho_attachment_error": str(e),
             })
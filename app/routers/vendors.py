@@ -1,20 +1,16 @@
-from fastapi import APIRouter, Request, HTTPException
-from app.core.zoho import zoho_request, zoho_json
+from fastapi import APIRouter, HTTPException
+from app.core.zoho import zoho_request
 
 router = APIRouter()
 
 
 @router.get("/vendors/list")
-def list_vendors(request: Request, page: int = 1, per_page: int = 200):
-    settings = request.app.state.settings
-    resp = zoho_request(
-        settings,
+async def list_vendors(page: int = 1, per_page: int = 200):
+    data = await zoho_request(
         "GET",
         "/contacts",
         params={"page": page, "per_page": per_page, "contact_type": "vendor"},
-        timeout=30,
     )
-    data = zoho_json(resp)
     if data.get("code") != 0:
         raise HTTPException(400, data)
 
@@ -9,6 +9,7 @@ from typing import Any, Dict, List, Optional
 
 from ..core.config import settings
 from ..core.security import hash_password, verify_password, new_session_token
+from ..core.utils import ensure_dir
 
 
 class AuthStore:
@@ -49,7 +50,7 @@ class AuthStore:
             return {}
 
     def _save_json(self, path: str, data: Dict[str, Any]) -> None:
-        os.makedirs(os.path.dirname(path), exist_ok=True)
+        ensure_dir(os.path.dirname(path))
         with open(path, "w", encoding="utf-8") as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
 
@@ -2,10 +2,34 @@ from __future__ import annotations
 
 import csv
 import os
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from ..core.config import settings
 
+# Column-name variants seen across COA exports
+_ID_KEYS = ("Account ID", "Account Id", "account_id")
+_NAME_KEYS = ("Account Name", "account_name")
+
+# Account Type substrings (matched against the lower-cased type)
+_EXPENSE_TYPES = ("expense", "cost of goods sold")
+_PAID_THROUGH_TYPES = ("bank", "cash", "credit card")
+
+
+def _first(r: Dict[str, str], keys) -> str:
+    for k in keys:
+        v = r.get(k)
+        if v:
+            return v.strip()
+    return ""
+
+
+def _row_id(r: Dict[str, str]) -> str:
+    return _first(r, _ID_KEYS)
+
+
+def _row_name(r: Dict[str, str]) -> str:
+    return _first(r, _NAME_KEYS)
+
 
 class COAStore:
     """
@@ -16,6 +40,8 @@ class COAStore:
         self.csv_path = csv_path
         self._rows: List[Dict[str, str]] = []
         self._loaded = False
+        # Derived lists/lookups, built once from the loaded rows
+        self._cache: Dict[str, Any] = {}
 
     def _load(self) -> None:
         if self._loaded:
@@ -29,25 +55,42 @@ class COAStore:
             reader = csv.DictReader(f)
             self._rows = [r for r in reader]
 
-    def expense_accounts(self) -> List[Dict[str, str]]:
+    def _cached(self, name: str, build):
+        # "in" check rather than .get() so a cached None is a hit too
         self._load()
-        # Heuristic: include "Expense" and "Cost of Goods Sold"
+        if name not in self._cache:
+            self._cache[name] = build()
+        return self._cache[name]
+
+    def _rows_of_type(self, types: Tuple[str, ...]) -> List[Dict[str, str]]:
         out = []
         for r in self._rows:
             t = (r.get("Account Type") or "").strip().lower()
-            if "expense" in t or "cost of goods sold" in t:
+            if any(x in t for x in types):
                 out.append(r)
         return out
 
+    def expense_accounts(self) -> List[Dict[str, str]]:
+        # Heuristic: include "Expense" and "Cost of Goods Sold"
+        return self._cached("expense", lambda: self._rows_of_type(_EXPENSE_TYPES))
+
     def paid_through_accounts(self) -> List[Dict[str, str]]:
-        self._load()
         # Heuristic: bank/cash/credit card
-        out = []
-        for r in self._rows:
-            t = (r.get("Account Type") or "").strip().lower()
-            if any(x in t for x in ["bank", "cash", "credit card"]):
-                out.append(r)
-        return out
+        return self._cached("paid_through", lambda: self._rows_of_type(_PAID_THROUGH_TYPES))
+
+    def paid_through_by_id(self) -> Dict[str, str]:
+        """
+        {Account ID: Account Name} for paid-through accounts, built once per load.
+        """
+        def build() -> Dict[str, str]:
+            out: Dict[str, str] = {}
+            for r in self.paid_through_accounts():
+                rid = _row_id(r)
+                if rid and rid not in out:
+                    out[rid] = _row_name(r)
+            return out
+
+        return self._cached("paid_through_by_id", build)
 
     def accrued_paid_through_account(self) -> Optional[Dict[str, str]]:
         """
@@ -55,14 +98,27 @@ class COAStore:
         Matching is by:
           - settings.accrued_paid_through_account_id if provided, else
           - Account Name equals settings.accrued_expenses_account_name (case-insensitive)
+        Cached per load, including a None result.
         """
-        self._load()
+        return self._cached("accrued_paid_through", self._find_accrued_paid_through)
+
+    def accrued_paid_through_ref(self) -> Optional[Tuple[str, str]]:
+        """
+        (account_id, account_name) of the accrued paid-through account, or None.
+        """
+        def build() -> Optional[Tuple[str, str]]:
+            acc = self.accrued_paid_through_account()
+            if not acc:
+                return None
+            return (_row_id(acc), _row_name(acc) or "Accrued Expenses")
+
+        return self._cached("accrued_paid_through_ref", build)
 
+    def _find_accrued_paid_through(self) -> Optional[Dict[str, str]]:
         if settings.accrued_paid_through_account_id:
             target = settings.accrued_paid_through_account_id.strip()
             for r in self._rows:
-                rid = (r.get("Account ID") or r.get("Account Id") or r.get("account_id") or "").strip()
-                if rid == target:
+                if _row_id(r) == target:
                     return r
 
         target_name = (settings.accrued_expenses_account_name or "").strip().lower()
@@ -70,8 +126,7 @@ class COAStore:
             return None
 
         for r in self._rows:
-            name = (r.get("Account Name") or r.get("account_name") or "").strip().lower()
-            if name == target_name:
+            if _row_name(r).lower() == target_name:
                 return r
         return None
 
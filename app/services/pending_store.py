@@ -6,7 +6,10 @@ import threading
 import time
 import inspect
 from datetime import date, datetime
-from typing import Any, Dict, List, Optional, Tuple
+from functools import lru_cache
+from typing import AbstractSet, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from ..core.utils import ensure_dir
 
 
 def _safe_int(v: Any) -> Optional[int]:
@@ -27,23 +30,47 @@ def _safe_float(v: Any) -> Optional[float]:
         return None
 
 
+def _pending_amount(rec: Dict[str, Any]) -> Optional[float]:
+    # Record amount, falling back to the raw payload's
+    amt = _safe_float(rec.get("amount"))
+    if amt is None and isinstance(rec.get("payload"), dict):
+        amt = _safe_float(rec["payload"].get("amount"))
+    return amt
+
+
+@lru_cache(maxsize=4096)
+def _parse_date_str(s: str) -> Optional[date]:
+    # Canonical YYYY-MM-DD goes through the fast C parser; anything else
+    # (e.g. unpadded "2024-1-5") keeps the lenient strptime behaviour
+    if len(s) == 10 and s[4] == "-" and s[7] == "-":
+        try:
+            return date.fromisoformat(s)
+        except ValueError:
+            pass
+    try:
+        return datetime.strptime(s, "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
 def _parse_yyyy_mm_dd(s: Any) -> Optional[date]:
     if not s:
         return None
-    try:
-        return datetime.strptime(str(s), "%Y-%m-%d").date()
-    except Exception:
-        return None
+    # many records share a date, so parses are cached per string
+    return _parse_date_str(str(s))
+
+
+@lru_cache(maxsize=8)
+def _month_bounds_for(year: int, month: int) -> Tuple[str, str]:
+    # [first of month, first of next month) -- the end bound is exclusive
+    ny, nm = (year + 1, 1) if month == 12 else (year, month + 1)
+    return (f"{year:04d}-{month:02d}-01", f"{ny:04d}-{nm:02d}-01")
 
 
 def _month_bounds(today: Optional[date] = None) -> Tuple[str, str]:
+    # Keyed on (year, month) so the cache rolls over with the calendar
     t = today or date.today()
-    start = t.replace(day=1)
-    if start.month == 12:
-        nxt = start.replace(year=start.year + 1, month=1)
-    else:
-        nxt = start.replace(month=start.month + 1)
-    return (start.isoformat(), nxt.isoformat())
+    return _month_bounds_for(t.year, t.month)
 
 
 def _json_sanitize(obj: Any) -> Any:
@@ -79,6 +106,11 @@ class PendingStore:
         self._lock = threading.Lock()
         self._data: Dict[str, Dict[str, Any]] = {}
         self._loaded = False
+        # Bumped on every write; lets callers tell whether cached reads are stale
+        self.version = 0
+        # expense_id -> {clearing_id: clearing entry}; entries are the same
+        # dicts held in rec["clearing"], kept in step on every write
+        self._clearing_index: Dict[str, Dict[str, Dict[str, Any]]] = {}
 
     # ----------------------------------------------------
     # RECEIPTS
@@ -120,6 +152,19 @@ class PendingStore:
         if changed:
             self._save()
 
+    def _index_clearing(self, key: str, rec: Optional[Dict[str, Any]]) -> None:
+        clearing = (rec or {}).get("clearing")
+        if not clearing:
+            self._clearing_index.pop(key, None)
+            return
+        idx: Dict[str, Dict[str, Any]] = {}
+        for c in clearing:
+            cid = (c or {}).get("clearing_id")
+            if cid:
+                # first entry wins, as with the old linear lookup
+                idx.setdefault(str(cid), c)
+        self._clearing_index[key] = idx
+
     def _load(self) -> None:
         if self._loaded:
             return
@@ -136,9 +181,12 @@ class PendingStore:
             self._data = {}
 
         self._ensure_clearing_ids()
+        for key, rec in self._data.items():
+            self._index_clearing(key, rec)
 
     def _save(self) -> None:
-        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.version += 1
+        ensure_dir(os.path.dirname(self.path))
         with open(self.path, "w", encoding="utf-8") as f:
             json.dump(
                 _json_sanitize(self._data),
@@ -165,15 +213,31 @@ class PendingStore:
                 if str(rec.get("paid_through_account_id")) != str(account_id):
                     continue
 
-                amt = _safe_float(rec.get("amount"))
-                if amt is None and isinstance(rec.get("payload"), dict):
-                    amt = _safe_float(rec["payload"].get("amount"))
-
+                amt = _pending_amount(rec)
                 if amt:
                     total += float(amt)
 
         return float(total)
 
+    def pending_totals_by_account(self) -> Dict[str, float]:
+        """
+        {paid_through_account_id: pending total} in one pass over the store.
+        """
+        self._load()
+        totals: Dict[str, float] = {}
+
+        with self._lock:
+            for rec in self._data.values():
+                if rec.get("status") != "pending":
+                    continue
+
+                amt = _pending_amount(rec)
+                if amt:
+                    k = str(rec.get("paid_through_account_id"))
+                    totals[k] = totals.get(k, 0.0) + float(amt)
+
+        return totals
+
     # ----------------------------------------------------
     # CRUD
     # ----------------------------------------------------
@@ -254,6 +318,7 @@ class PendingStore:
 
         with self._lock:
             self._data[expense_id] = normalized
+            self._index_clearing(expense_id, normalized)
             self._save()
 
         return normalized
@@ -323,6 +388,8 @@ class PendingStore:
             safe_fields = _json_sanitize(fields)
             if isinstance(safe_fields, dict):
                 rec.update(safe_fields)
+                if "clearing" in safe_fields:
+                    self._index_clearing(key, rec)
 
             # keep payload aligned + keep accrued balance consistent
             self._sync_payload_from_record(rec)
@@ -343,7 +410,10 @@ class PendingStore:
             if not rec or rec.get("status") != "pending":
                 return None
 
-            rec.update(_json_sanitize(updates))
+            safe_updates = _json_sanitize(updates)
+            rec.update(safe_updates)
+            if "clearing" in safe_updates:
+                self._index_clearing(key, rec)
 
             # keep payload aligned + keep accrued balance consistent
             self._sync_payload_from_record(rec)
@@ -360,6 +430,69 @@ class PendingStore:
             if key not in self._data:
                 return False
             del self._data[key]
+            self._clearing_index.pop(key, None)
+            self._save()
+            return True
+
+    # ----------------------------------------------------
+    # Read-modify-write (single lock hold)
+    # ----------------------------------------------------
+
+    def get_and_update(
+        self,
+        expense_id: str,
+        fn: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]],
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Look up a record and apply `fn(rec)`'s returned updates under one lock
+        hold, so checks made in `fn` can't race the write. `fn` may raise to
+        abort (nothing is written) and must not call back into the store.
+        Returns the updated record, or None if it doesn't exist.
+        """
+        self._load()
+        key = str(expense_id)
+
+        with self._lock:
+            rec = self._data.get(key)
+            if not rec:
+                return None
+
+            updates = fn(rec)
+            if not updates:
+                return rec
+
+            safe_updates = _json_sanitize(updates)
+            rec.update(safe_updates)
+            if "clearing" in safe_updates:
+                self._index_clearing(key, rec)
+
+            # keep payload aligned + keep accrued balance consistent
+            self._sync_payload_from_record(rec)
+            self._recompute_accrued_balance_if_needed(rec)
+
+            self._save()
+            return rec
+
+    def get_and_delete(
+        self,
+        expense_id: str,
+        fn: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> bool:
+        """
+        Delete a record after `fn(rec)` (e.g. a permission check) passes, under
+        one lock hold. `fn` may raise to abort. Returns False if not found.
+        """
+        self._load()
+        key = str(expense_id)
+
+        with self._lock:
+            rec = self._data.get(key)
+            if not rec:
+                return False
+            if fn is not None:
+                fn(rec)
+            del self._data[key]
+            self._clearing_index.pop(key, None)
             self._save()
             return True
 
@@ -367,13 +500,21 @@ class PendingStore:
     # Listing
     # ----------------------------------------------------
 
-    def list_approved(
+    def iter_approved(
         self,
         *,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
         default_current_month: bool = False,
-    ) -> List[Dict[str, Any]]:
+        created_by: Optional[str] = None,
+        paid_through_in: Optional[AbstractSet[str]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Approved expenses in the date range (unordered). When `created_by`
+        and/or `paid_through_in` are given, only records created by that user
+        OR paid through one of those accounts are kept. Iterates a snapshot,
+        so the lock isn't held while the caller consumes it.
+        """
         self._load()
 
         if not start_date and not end_date and default_current_month:
@@ -382,24 +523,50 @@ class PendingStore:
         sd = _parse_yyyy_mm_dd(start_date)
         ed = _parse_yyyy_mm_dd(end_date)
 
-        out: List[Dict[str, Any]] = []
+        scoped = created_by is not None or paid_through_in is not None
 
         with self._lock:
-            for rec in self._data.values():
-                if rec.get("status") != "approved":
-                    continue
-                if (rec.get("pending_kind") or "expense") != "expense":
-                    continue
+            records = list(self._data.values())
 
-                d = _parse_yyyy_mm_dd(rec.get("date"))
-                if sd and (not d or d < sd):
-                    continue
-                if ed and (not d or d >= ed):
-                    continue
+        for rec in records:
+            if rec.get("status") != "approved":
+                continue
+            if (rec.get("pending_kind") or "expense") != "expense":
+                continue
 
-                out.append(rec)
+            d = _parse_yyyy_mm_dd(rec.get("date"))
+            if sd and (not d or d < sd):
+                continue
+            if ed and (not d or d >= ed):
+                continue
 
-        out.sort(key=lambda x: x.get("approved_at", 0), reverse=True)
+            if scoped and not (
+                (created_by is not None and rec.get("created_by") == created_by)
+                or (paid_through_in is not None and rec.get("paid_through_account_id") in paid_through_in)
+            ):
+                continue
+
+            yield rec
+
+    def list_approved(
+        self,
+        *,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        default_current_month: bool = False,
+        created_by: Optional[str] = None,
+        paid_through_in: Optional[AbstractSet[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        out = list(self.iter_approved(
+            start_date=start_date,
+            end_date=end_date,
+            default_current_month=default_current_month,
+            created_by=created_by,
+            paid_through_in=paid_through_in,
+        ))
+
+        # expense_id breaks approved_at ties so the order is stable for paging
+        out.sort(key=lambda x: (x.get("approved_at") or 0, str(x.get("expense_id") or "")), reverse=True)
         return out
 
     def list_accrued(self, *, include_cleared: bool = False) -> List[Dict[str, Any]]:
@@ -457,25 +624,78 @@ class PendingStore:
     # State transitions
     # ----------------------------------------------------
 
-    def approve(self, expense_id: str, *, zoho_response: Optional[Dict[str, Any]] = None) -> bool:
+    def _approve_locked(
+        self,
+        rec: Dict[str, Any],
+        zoho_response: Optional[Dict[str, Any]],
+        fields: Optional[Dict[str, Any]],
+    ) -> None:
+        # Caller holds self._lock and saves afterwards
+        rec["status"] = "approved"
+        rec["approved_at"] = int(time.time())
+
+        if zoho_response is not None:
+            rec["zoho_posted"] = True
+            rec["zoho_error"] = None
+            rec["zoho_response"] = zoho_response
+
+        if fields:
+            safe_fields = _json_sanitize(fields)
+            if isinstance(safe_fields, dict):
+                rec.update(safe_fields)
+            self._sync_payload_from_record(rec)
+            self._recompute_accrued_balance_if_needed(rec)
+
+    def approve(
+        self,
+        expense_id: str,
+        *,
+        zoho_response: Optional[Dict[str, Any]] = None,
+        fields: Optional[Dict[str, Any]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Mark approved and apply `fields` (e.g. Zoho ids) in the same write.
+        Returns the updated record, or None if not found.
+        """
         self._load()
         key = str(expense_id)
 
         with self._lock:
             rec = self._data.get(key)
             if not rec:
-                return False
+                return None
 
-            rec["status"] = "approved"
-            rec["approved_at"] = int(time.time())
+            self._approve_locked(rec, zoho_response, fields)
+            self._save()
+            return rec
 
-            if zoho_response is not None:
-                rec["zoho_posted"] = True
-                rec["zoho_error"] = None
-                rec["zoho_response"] = zoho_response
+    def approve_accrued_payment(
+        self,
+        expense_id: str,
+        source_id: str,
+        *,
+        zoho_response: Optional[Dict[str, Any]] = None,
+        fields: Optional[Dict[str, Any]] = None,
+        **clearing: Any,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        approve() for a clearing payment plus clear_accrued() on its source
+        accrued expense, applied together under one lock and one save.
+        `clearing` takes clear_accrued's keyword arguments.
+        Returns the updated payment record, or None if not found.
+        """
+        self._load()
+        key = str(expense_id)
+
+        with self._lock:
+            rec = self._data.get(key)
+            if not rec:
+                return None
 
+            self._approve_locked(rec, zoho_response, fields)
+            self._clear_accrued_locked(str(source_id), **clearing)
             self._save()
-            return True
+            return rec
 
     def reject(self, expense_id: str) -> bool:
         self._load()
@@ -526,57 +746,78 @@ class PendingStore:
         receipts: Optional[list] = None,
     ) -> Optional[Dict[str, Any]]:
         self._load()
-        key = str(expense_id)
+        with self._lock:
+            rec = self._clear_accrued_locked(
+                str(expense_id),
+                amount=amount,
+                paid_through_account_id=paid_through_account_id,
+                paid_through_account_name=paid_through_account_name,
+                clearing_date=clearing_date,
+                reference_number=reference_number,
+                source_payment_id=source_payment_id,
+                receipts=receipts,
+            )
+            if rec is not None:
+                self._save()
+            return rec
+
+    def _clear_accrued_locked(
+        self,
+        key: str,
+        *,
+        amount: float,
+        paid_through_account_id: str,
+        paid_through_account_name: Optional[str] = None,
+        clearing_date: Optional[str] = None,
+        reference_number: Optional[str] = None,
+        source_payment_id: Optional[str] = None,
+        receipts: Optional[list] = None,
+    ) -> Optional[Dict[str, Any]]:
+        # Caller holds self._lock and saves if a record is returned
         amt = _safe_float(amount)
         if not amt or amt <= 0:
             return None
 
-        with self._lock:
-            rec = self._data.get(key)
-            if not rec:
-                return None
-            if rec.get("status") != "approved":
-                return None
-            if (rec.get("expense_type") or "").lower() != "accrued":
-                return None
+        rec = self._data.get(key)
+        if not rec:
+            return None
+        if rec.get("status") != "approved":
+            return None
+        if (rec.get("expense_type") or "").lower() != "accrued":
+            return None
 
-            # recompute balance from amount - sum(clearing)
-            clearing = rec.get("clearing") or []
-            new_entry = {
-                "clearing_id": str(int(time.time() * 1000)),
-                "amount": float(amt),
-                "paid_through_account_id": paid_through_account_id,
-                "paid_through_account_name": paid_through_account_name or "",
-                "date": clearing_date or "",
-                "reference_number": reference_number or "",
-                "source_payment_id": source_payment_id or "",
-                "receipts": receipts or [],
-                "created_at": int(time.time()),
-            }
-            clearing.append(new_entry)
-            rec["clearing"] = clearing
+        # recompute balance from amount - sum(clearing)
+        clearing = rec.get("clearing") or []
+        new_entry = {
+            "clearing_id": str(int(time.time() * 1000)),
+            "amount": float(amt),
+            "paid_through_account_id": paid_through_account_id,
+            "paid_through_account_name": paid_through_account_name or "",
+            "date": clearing_date or "",
+            "reference_number": reference_number or "",
+            "source_payment_id": source_payment_id or "",
+            "receipts": receipts or [],
+            "created_at": int(time.time()),
+        }
+        clearing.append(new_entry)
+        rec["clearing"] = clearing
+        self._clearing_index.setdefault(key, {}).setdefault(new_entry["clearing_id"], new_entry)
 
-            total_cleared = sum((_safe_float(c.get("amount")) or 0.0) for c in clearing)
-            orig_amt = _safe_float(rec.get("amount")) or 0.0
-            rec["balance"] = max(0.0, round(orig_amt - total_cleared, 2))
+        total_cleared = sum((_safe_float(c.get("amount")) or 0.0) for c in clearing)
+        orig_amt = _safe_float(rec.get("amount")) or 0.0
+        rec["balance"] = max(0.0, round(orig_amt - total_cleared, 2))
 
-            if rec["balance"] <= 0:
-                rec["cleared_at"] = rec.get("cleared_at") or int(time.time())
-            else:
-                rec["cleared_at"] = None
+        if rec["balance"] <= 0:
+            rec["cleared_at"] = rec.get("cleared_at") or int(time.time())
+        else:
+            rec["cleared_at"] = None
 
-            self._save()
-            return rec
+        return rec
 
     def get_clearing(self, expense_id: str, clearing_id: str) -> Optional[Dict[str, Any]]:
         self._load()
-        rec = self.get(expense_id)
-        if not rec:
-            return None
-        for c in (rec.get("clearing") or []):
-            if str(c.get("clearing_id")) == str(clearing_id):
-                return c
-        return None
+        with self._lock:
+            return self._clearing_index.get(str(expense_id), {}).get(str(clearing_id))
 
     def update_clearing(self, expense_id: str, clearing_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         self._load()
@@ -591,14 +832,12 @@ class PendingStore:
                 return None
 
             clearing = rec.get("clearing") or []
-            found = None
-            for c in clearing:
-                if str(c.get("clearing_id")) == cid:
-                    c.update(_json_sanitize(updates or {}))
-                    found = c
-                    break
+            found = self._clearing_index.get(key, {}).get(cid)
             if not found:
                 return None
+            found.update(_json_sanitize(updates or {}))
+            if str(found.get("clearing_id")) != cid:
+                self._index_clearing(key, rec)
 
             # recompute balance
             total_cleared = sum((_safe_float(x.get("amount")) or 0.0) for x in clearing)
@@ -627,6 +866,7 @@ class PendingStore:
                 return False
 
             rec["clearing"] = new_list
+            self._index_clearing(key, rec)
 
             total_cleared = sum((_safe_float(x.get("amount")) or 0.0) for x in new_list)
             orig_amt = _safe_float(rec.get("amount")) or 0.0